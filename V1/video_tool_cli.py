@@ -2,6 +2,7 @@
 import sys
 from pathlib import Path
 from video_tool_core import (
+    IMAGE_FORMATS,
     extract_frames,
     convert_to_mp4,
     merge_videos_recursively,
@@ -11,7 +12,7 @@ def show_usage():
     print("==============================================")
     print("          Video Processing Tool Guide")
     print("==============================================")
-    print("Usage: VideoFrameExtractor <command> <path>")
+    print("Usage: VideoFrameExtractor <command> <path> [--jobs N] [--format jpg|png|webp]")
     print("")
     print("Command Description:")
     print("  getframe      Extract video frames")
@@ -19,20 +20,54 @@ def show_usage():
     print("  mergevideo    Merge video files in directory (recursively process each subdirectory)")
     print("")
     print("Parameter Description:")
-    print("  <path>  Specify a single video file or directory containing video files.")
+    print("  <path>       Specify a single video file or directory containing video files.")
+    print("  --jobs N, -j N")
+    print("               Number of files processed in parallel for directories")
+    print("               (default: $VTC_JOBS, else half the CPU cores; 1 disables parallelism).")
+    print("  --format jpg|png|webp")
+    print("               Image format for getframe (default: jpg; webp is lossless).")
+    print("")
+    print("Environment:")
+    print("  VTC_JOBS      Default for --jobs; OpenCV's own thread pool is sized to")
+    print("                CPU cores / jobs so the two levels don't oversubscribe.")
+    print("  VTC_OPENCL=1  Re-enable OpenCL in OpenCV (off by default).")
     print("")
     print("Supported Video Formats:")
     print("  mp4, avi, mkv, mov, flv, wmv, webm")
     print("==============================================")
 
+def parse_args(argv):
+    args, opts = [], {"jobs": None, "format": "jpg"}
+    it = iter(argv)
+    for a in it:
+        if a in ("--jobs", "-j", "--threadcount"):
+            value = next(it, None)
+            if value is None or not value.isdigit() or int(value) < 1:
+                raise ValueError(f"'{a}' requires a positive integer.")
+            opts["jobs"] = int(value)
+        elif a == "--format":
+            value = (next(it, None) or "").lower()
+            if value not in IMAGE_FORMATS:
+                raise ValueError(f"'--format' must be one of: {', '.join(IMAGE_FORMATS)}.")
+            opts["format"] = value
+        else:
+            args.append(a)
+    return args, opts
+
 def main(argv=None):
     argv = argv or sys.argv[1:]
+    try:
+        argv, opts = parse_args(argv)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
     if len(argv) < 2:
         show_usage()
         return 1
 
     command = argv[0].lower()
     input_path = argv[1]
+    jobs = opts["jobs"]
     p = Path(input_path)
 
     if not p.exists():
@@ -40,11 +75,11 @@ def main(argv=None):
         return 1
 
     if command == "getframe":
-        ok = extract_frames(input_path)
+        ok = extract_frames(input_path, jobs=jobs, img_format=opts["format"])
     elif command == "getmp4":
-        ok = convert_to_mp4(input_path)
+        ok = convert_to_mp4(input_path, jobs=jobs)
     elif command == "mergevideo":
-        ok = merge_videos_recursively(input_path)
+        ok = merge_videos_recursively(input_path, jobs=jobs)
     else:
         print(f"Error: Unknown command '{command}'.")
         show_usage()
@@ -1,42 +1,281 @@
 # video_tool_core.py
 from __future__ import annotations
 import cv2
+import multiprocessing
+import numpy as np
 import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Callable, Iterable
+from typing import Callable, Iterator, TypeVar
 
 VIDEO_EXTENSIONS = {"mp4", "avi", "mkv", "mov", "flv", "wmv", "webm"}
 
+# Output formats for extracted frames: ffmpeg encoder args / cv2.imwrite params.
+# PNG uses the fastest zlib level, WebP is lossless (quality > 100).
+IMAGE_FORMATS = ("jpg", "png", "webp")
+_FFMPEG_IMAGE_ARGS = {
+    "jpg": ["-c:v", "mjpeg", "-q:v", "3"],
+    "png": ["-c:v", "png", "-compression_level", "1"],
+    "webp": ["-c:v", "libwebp", "-lossless", "1"],
+}
+_IMWRITE_PARAMS = {
+    "jpg": [cv2.IMWRITE_JPEG_QUALITY, 92, cv2.IMWRITE_JPEG_OPTIMIZE, 0],
+    "png": [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    "webp": [cv2.IMWRITE_WEBP_QUALITY, 101],
+}
+
+# Codecs MP4 can hold as-is, so getmp4 can remux them without re-encoding
+_REMUX_CODECS = {"h264", "hevc", "mpeg4"}
+
 LogFn = Callable[[str], None]
+T = TypeVar("T")
+
+# dotted suffixes for str.endswith, which does the tuple scan in C
+_VIDEO_SUFFIXES = tuple("." + e for e in VIDEO_EXTENSIONS)
 
 def is_video_file(p: str | os.PathLike) -> bool:
-    ext = Path(p).suffix.lower().lstrip(".")
-    return ext in VIDEO_EXTENSIONS
+    s = p if isinstance(p, str) else os.fspath(p)
+    return s.lower().endswith(_VIDEO_SUFFIXES)
 
 def _safe_fps(cap, default: float = 25.0) -> float:
     fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
     return fps if fps and fps > 0 else default
 
-def _iter_all_files(root: Path) -> Iterable[Path]:
-    for p in root.rglob("*"):
-        if p.is_file() and is_video_file(p):
-            yield p
+@lru_cache(maxsize=None)
+def _cuda_available() -> bool:
+    # cudacodec only exists in CUDA-enabled OpenCV builds (not the pip wheels)
+    if not hasattr(cv2, "cudacodec"):
+        return False
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except cv2.error:
+        return False
+
+@contextmanager
+def _quiet_probe() -> Iterator[None]:
+    # A failed probe is expected on builds without an H.264 encoder, but
+    # OpenCV logs it as [ERROR:...] and FFmpeg's av_log prints the encoder
+    # errors itself. OpenCV resets FFmpeg's log level from its own config on
+    # every open, so the only runtime switch for that is stderr (fd 2).
+    log_level = cv2.utils.logging.getLogLevel()
+    cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_SILENT)
+    sys.stderr.flush()
+    saved_fd = os.dup(2)
+    try:
+        with open(os.devnull, "w") as devnull:
+            os.dup2(devnull.fileno(), 2)
+        yield
+    finally:
+        os.dup2(saved_fd, 2)
+        os.close(saved_fd)
+        cv2.utils.logging.setLogLevel(log_level)
+
+@lru_cache(maxsize=None)
+def _mp4_fourcc() -> int:
+    # Prefer H.264 (avc1) when this OpenCV/FFmpeg build can encode it,
+    # otherwise OpenCV's built-in MPEG-4 Part 2 encoder (mp4v).
+    with tempfile.TemporaryDirectory() as tmp, _quiet_probe():
+        fourcc = cv2.VideoWriter_fourcc(*"avc1")
+        probe = cv2.VideoWriter(os.path.join(tmp, "probe.mp4"), cv2.CAP_FFMPEG, fourcc, 25.0, (64, 64))
+        ok = probe.isOpened()
+        probe.release()
+    return fourcc if ok else cv2.VideoWriter_fourcc(*"mp4v")
+
+@lru_cache(maxsize=None)
+def _ffmpeg_encoders() -> frozenset[str]:
+    # Encoder names this ffmpeg build offers (libwebp is an optional
+    # external library), or an empty set if ffmpeg is missing/fails.
+    if not shutil.which("ffmpeg"):
+        return frozenset()
+    res = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True)
+    if res.returncode != 0:
+        return frozenset()
+    # a flags legend, a " ------" line, then rows like
+    # " V....D libwebp    libwebp WebP image (codec webp)"
+    _, _, table = res.stdout.partition("------")
+    rows = (line.split() for line in table.splitlines())
+    return frozenset(row[1] for row in rows if len(row) > 1)
+
+def _open_mp4_writer(out_path: Path, fps: float, size: tuple[int, int]):
+    fourcc = _mp4_fourcc()
+    writer = cv2.VideoWriter(str(out_path), cv2.CAP_FFMPEG, fourcc, fps, size)
+    mp4v = cv2.VideoWriter_fourcc(*"mp4v")
+    if not writer.isOpened() and fourcc != mp4v:
+        # H.264 encoders reject some sizes (e.g. odd dimensions)
+        writer = cv2.VideoWriter(str(out_path), cv2.CAP_FFMPEG, mp4v, fps, size)
+    return writer
+
+def _probe_video_stream(video_path: Path, entries: str = "codec_name") -> dict[str, str] | None:
+    # ffprobe fields of the first video stream, or None if ffprobe is unavailable/fails
+    if not shutil.which("ffprobe"):
+        return None
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", f"stream={entries}",
+        "-of", "default=noprint_wrappers=1",
+        str(video_path),
+    ]
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    if res.returncode != 0:
+        return None
+    info = dict(line.split("=", 1) for line in res.stdout.splitlines() if "=" in line)
+    return info or None
+
+def _scan_video_tree(root: Path) -> dict[Path, list[Path]]:
+    # One os.scandir pass over the tree: every directory (including ones
+    # without videos, like os.walk) mapped to its video files, top-down.
+    # scandir reuses the d_type from the directory read, so only matching
+    # entries cost a stat() and a Path object. Symlinked directories are
+    # not followed.
+    tree: dict[Path, list[Path]] = {}
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        vids: list[Path] = []
+        subdirs = []
+        try:
+            with os.scandir(current) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(e.path)
+                    elif is_video_file(e.name) and e.is_file():
+                        vids.append(Path(e.path))
+        except OSError:
+            continue
+        tree[Path(current)] = vids
+        stack.extend(reversed(subdirs))
+    return tree
+
+def _iter_all_files(root: Path) -> list[Path]:
+    return [f for vids in _scan_video_tree(root).values() for f in vids]
 
 def _ensure_parent_dir(p: Path):
     p.parent.mkdir(parents=True, exist_ok=True)
 
+# VTC_JOBS is the overall thread budget knob: the number of files processed
+# in parallel, with OpenCV's internal pool getting cpu_count // VTC_JOBS
+# threads in each worker so the two levels don't oversubscribe the CPU.
+def _env_jobs() -> int | None:
+    value = os.environ.get("VTC_JOBS", "")
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+def _default_jobs() -> int:
+    return _env_jobs() or max(1, (os.cpu_count() or 2) // 2)
+
+def _configure_opencv(jobs: int) -> None:
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // max(1, jobs)))
+    # OpenCL buys nothing for decode/resize/encode here and its first-use
+    # kernel compilation stalls the first frame; VTC_OPENCL=1 opts back in
+    cv2.ocl.setUseOpenCL(os.environ.get("VTC_OPENCL") == "1")
+
+_configure_opencv(_env_jobs() or 1)
+
+# ------------------------
+# per-file parallelism
+# ------------------------
+# Worker processes (not threads) so each job gets its own OpenCV/ffmpeg
+# thread pool instead of all of them fighting inside one interpreter.
+_worker_log: LogFn = print
+
+def _init_worker(log_queue, jobs: int) -> None:
+    global _worker_log
+    _worker_log = log_queue.put
+    _configure_opencv(jobs)
+
+def _call_job(fn: Callable[[T, LogFn], bool], item: T, log: LogFn) -> bool:
+    # One bad file fails on its own; an exception escaping a pool job would
+    # abort the whole run while workers still hold undrained log lines.
+    try:
+        return fn(item, log)
+    except Exception as e:
+        log(f"Error: {type(e).__name__}: {e}")
+        return False
+
+def _run_group(fn: Callable[[T, LogFn], bool], items: list[T], msgs: list[str]) -> list[bool]:
+    results = []
+    for item, msg in zip(items, msgs):
+        _worker_log(msg)
+        results.append(_call_job(fn, item, _worker_log))
+    return results
+
+def _drain_log(log_queue, log: LogFn) -> None:
+    while True:
+        try:
+            log(log_queue.get_nowait())
+        except queue.Empty:
+            return
+
+def _output_key(video_path: Path) -> tuple[Path, str]:
+    # getframe and getmp4 name their output after the stem, so clip.avi and
+    # clip.mkv in one directory write to the same place
+    return video_path.parent, video_path.stem
+
+def _map_jobs(fn: Callable[[T, LogFn], bool], items: list[T], log: LogFn,
+              jobs: int | None, describe: Callable[[T], str],
+              key: Callable[[T], object] | None = None) -> Iterator[tuple[T, bool]]:
+    # Yields (item, ok) in completion order. describe(item) is logged as each
+    # item starts; it runs in this process, so it needn't be picklable.
+    # Items with the same key(item) share an output and run in order within
+    # one job. Worker log lines are relayed to `log` from the calling
+    # thread, so LogFn callers need no locking.
+    jobs = _default_jobs() if jobs is None else jobs
+    if key is None:
+        groups = [[item] for item in items]
+    else:
+        by_key: dict[object, list[T]] = {}
+        for item in items:
+            by_key.setdefault(key(item), []).append(item)
+        groups = list(by_key.values())
+    if jobs <= 1 or len(groups) <= 1:
+        # everything runs here, so OpenCV gets the whole CPU whatever VTC_JOBS said at import
+        _configure_opencv(1)
+        for item in items:
+            log(describe(item))
+            yield item, _call_job(fn, item, log)
+        return
+
+    # spawn: forking a process that already holds threads (Qt) or a CUDA context is unsafe
+    ctx = multiprocessing.get_context("spawn")
+    log_queue = ctx.Queue()
+    workers = min(jobs, len(groups))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(log_queue, workers)) as ex:
+        futures = {ex.submit(_run_group, fn, group, [describe(item) for item in group]): group
+                   for group in groups}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            _drain_log(log_queue, log)
+            for fut in done:
+                yield from zip(futures[fut], fut.result())
+    _drain_log(log_queue, log)
+
 # ------------------------
 # getframe implementation
 # ------------------------
-def extract_frames(input_path: str | os.PathLike, log: LogFn = print) -> bool:
+def extract_frames(input_path: str | os.PathLike, log: LogFn = print, jobs: int | None = None,
+                   img_format: str = "jpg") -> bool:
+    if img_format not in IMAGE_FORMATS:
+        log(f"Error: Unsupported image format '{img_format}' (expected one of: {', '.join(IMAGE_FORMATS)}).")
+        return False
     p = Path(input_path)
     if p.is_dir():
         log(f"Detected directory: {p}")
         log("Starting to process video files in directory...")
         ok_all = True
-        for f in _iter_all_files(p):
-            log(f"Processing video file: {f}")
-            if not _extract_frames_single(f, log):
+        files = _iter_all_files(p)
+        job = partial(_extract_frames_single, img_format=img_format)
+        for f, ok in _map_jobs(job, files, log, jobs, "Processing video file: {}".format,
+                               key=_output_key):
+            if not ok:
                 log(f"Processing failed: {f}")
                 ok_all = False
         log("All video files processed.")
@@ -46,14 +285,15 @@ def extract_frames(input_path: str | os.PathLike, log: LogFn = print) -> bool:
             log(f"Error: File '{p}' is not a supported video format.")
             return False
         log(f"Processing single video file: {p}")
-        ok = _extract_frames_single(p, log)
+        _configure_opencv(1)
+        ok = _extract_frames_single(p, log, img_format)
         log("Video file processed successfully." if ok else "Video file processing failed.")
         return ok
     else:
         log(f"Error: '{p}' is neither a file nor a directory.")
         return False
 
-def _extract_frames_single(video_path: Path, log: LogFn) -> bool:
+def _extract_frames_single(video_path: Path, log: LogFn, img_format: str = "jpg") -> bool:
     if not video_path.exists():
         log(f"Error: File '{video_path}' does not exist.")
         return False
@@ -62,48 +302,132 @@ def _extract_frames_single(video_path: Path, log: LogFn) -> bool:
     out_dir = video_path.parent / f"{name}_frames"
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    # "-c:v <encoder>" is the first pair of the ffmpeg args
+    if _FFMPEG_IMAGE_ARGS[img_format][1] in _ffmpeg_encoders():
+        ok = _extract_frames_ffmpeg(video_path, out_dir, name, img_format, log)
+    else:
+        ok = _extract_frames_opencv(video_path, out_dir, name, img_format, log)
+    if not ok:
+        return False
+
+    log(f"Frames saved to directory: {out_dir}")
+    return True
+
+def _extract_frames_ffmpeg(video_path: Path, out_dir: Path, name: str, img_format: str, log: LogFn) -> bool:
+    # fps=1 lets ffmpeg drop frames before they reach the encoder;
+    # image2 numbering starts at 1, same as the OpenCV path.
+    # '%' is the image2 pattern character, so escape it in the stem.
+    pattern = name.replace("%", "%%")
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", str(video_path),
+        "-vf", "fps=1",
+        *_FFMPEG_IMAGE_ARGS[img_format],
+        str(out_dir / f"{pattern}_%d.{img_format}"),
+    ]
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if res.returncode != 0:
+        log(f"Error: ffmpeg failed to extract frames from '{video_path}': {res.stderr.strip()}")
+        return False
+    return True
+
+def _extract_frames_opencv(video_path: Path, out_dir: Path, name: str, img_format: str, log: LogFn) -> bool:
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
         log(f"Error: Cannot open video '{video_path}'.")
         return False
 
+    # only used when the backend reports no timestamps
     fps = _safe_fps(cap, 25.0)
-    # save roughly 1 frame per second
-    frame_interval = max(int(round(fps)), 1)
 
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+
+    # Image encoding runs on a writer thread so it overlaps with decoding.
+    # Frames are retrieved straight into a small pool of preallocated
+    # buffers; the writer hands each one back once saved, which also
+    # bounds memory if the encoder falls behind.
+    free_q: queue.Queue = queue.Queue()
+    for _ in range(3):
+        free_q.put(np.empty((h, w, 3), dtype=np.uint8))
+    frames_q: queue.Queue = queue.Queue()
+    errors: list[str] = []
+    writer = threading.Thread(target=_frame_writer,
+                              args=(frames_q, free_q, out_dir, name, img_format, errors), daemon=True)
+    writer.start()
+
+    # Save the first frame of every 1 s of presentation time. Sampling by
+    # the container timestamps instead of counting frames at CAP_PROP_FPS
+    # stays correct for variable-frame-rate sources (webm, mkv). Frames are
+    # still grabbed in order: seeking with CAP_PROP_POS_MSEC per sample
+    # would re-decode from the previous keyframe each time on long-GOP files.
     saved = 0
     idx = 0
-    next_save = 0
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        if idx >= next_save:
-            saved += 1
-            out_path = out_dir / f"{name}_{saved}.png"  # 1-based numbering
-            cv2.imwrite(str(out_path), frame)
-            next_save += frame_interval
-        idx += 1
-
-    cap.release()
-    log(f"Frames saved to directory: {out_dir}")
+    next_ms = 0.0
+    try:
+        # grab() only demuxes/decodes; the BGR conversion in retrieve() is
+        # paid just for the frames we keep
+        while not errors and cap.grab():
+            t = cap.get(cv2.CAP_PROP_POS_MSEC)
+            if t <= 0 and idx:
+                t = idx * 1000.0 / fps
+            if t >= next_ms:
+                ok, frame = cap.retrieve(free_q.get())
+                if not ok:
+                    break
+                saved += 1
+                frames_q.put((saved, frame))
+                next_ms = (t // 1000 + 1) * 1000
+            idx += 1
+    finally:
+        frames_q.put(None)
+        writer.join()
+        cap.release()
+    if errors:
+        log(f"Error: Failed to save frames from '{video_path}': {errors[0]}")
+        return False
     return True
 
+def _frame_writer(frames_q: queue.Queue, free_q: queue.Queue, out_dir: Path, name: str,
+                  img_format: str, errors: list[str]) -> None:
+    # Failures go to `errors` instead of ending the thread: every buffer
+    # must still go back to free_q or the decode loop blocks forever.
+    params = _IMWRITE_PARAMS[img_format]
+    # build "<out_dir>/<name>_<n>.<ext>" by concatenation, not a Path per frame
+    out_prefix = str(out_dir / name) + "_"
+    out_suffix = "." + img_format
+    while True:
+        item = frames_q.get()
+        if item is None:
+            return
+        saved, frame = item
+        out_path = out_prefix + str(saved) + out_suffix  # 1-based numbering
+        try:
+            if not cv2.imwrite(out_path, frame, params):
+                errors.append(f"cv2.imwrite could not write '{out_path}'")
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            free_q.put(frame)
+
 # ------------------------
 # getmp4 implementation
 # ------------------------
-def convert_to_mp4(input_path: str | os.PathLike, log: LogFn = print) -> bool:
+def convert_to_mp4(input_path: str | os.PathLike, log: LogFn = print, jobs: int | None = None) -> bool:
     p = Path(input_path)
     if p.is_dir():
         log(f"Detected directory: {p}")
         log("Starting to convert non-MP4 video files in directory...")
         ok_all = True
+        files = []
         for f in _iter_all_files(p):
             if f.suffix.lower() == ".mp4":
                 log(f"File '{f}' is already in MP4 format, skipping conversion.")
                 continue
-            log(f"Processing video file: {f}")
-            if not _convert_single_to_mp4(f, log):
+            files.append(f)
+        for f, ok in _map_jobs(_convert_single_to_mp4, files, log, jobs, "Processing video file: {}".format,
+                               key=_output_key):
+            if not ok:
                 log(f"Processing failed: {f}")
                 ok_all = False
         log("All video files converted.")
@@ -113,6 +437,7 @@ def convert_to_mp4(input_path: str | os.PathLike, log: LogFn = print) -> bool:
             log(f"Error: File '{p}' is not a supported video format.")
             return False
         log(f"Processing single video file: {p}")
+        _configure_opencv(1)
         ok = _convert_single_to_mp4(p, log)
         log("Video file converted successfully." if ok else "Video file conversion failed.")
         return ok
@@ -125,6 +450,15 @@ def _convert_single_to_mp4(video_path: Path, log: LogFn) -> bool:
         log(f"File '{video_path}' is already in MP4 format, skipping conversion.")
         return True
 
+    out_path = video_path.with_suffix(".mp4")
+    if shutil.which("ffmpeg"):
+        info = _probe_video_stream(video_path)
+        if info and info.get("codec_name") in _REMUX_CODECS:
+            if _remux_to_mp4(video_path, out_path, log):
+                log(f"Converted '{video_path}' to '{out_path}' (stream copy, audio dropped)")
+                return True
+            log(f"Warning: Stream copy failed for '{video_path}', re-encoding instead.")
+
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
         log(f"Error: Cannot open video '{video_path}'.")
@@ -138,24 +472,17 @@ def _convert_single_to_mp4(video_path: Path, log: LogFn) -> bool:
         log(f"Error: Cannot determine resolution for '{video_path}'.")
         return False
 
-    # OpenCV-friendly MP4 encoder (video only; audio dropped)
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    out_path = video_path.with_suffix(".mp4")
-    writer = cv2.VideoWriter(str(out_path), fourcc, fps, (w, h))
-    if not writer.isOpened():
-        cap.release()
-        log(f"Error: Cannot create output MP4 for '{video_path}'.")
-        return False
-
-    frames = 0
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        writer.write(frame)
-        frames += 1
+    frames = _convert_single_cuda(video_path, out_path, fps, (w, h)) if _cuda_available() else None
+    if frames is None:
+        # H.264 or mp4v MP4 writer (video only; audio dropped)
+        writer = _open_mp4_writer(out_path, fps, (w, h))
+        if not writer.isOpened():
+            cap.release()
+            log(f"Error: Cannot create output MP4 for '{video_path}'.")
+            return False
 
-    writer.release()
+        frames = _pipe_cap_to_writer(cap, writer, (h, w))
+        writer.release()
     cap.release()
 
     if frames == 0:
@@ -166,10 +493,56 @@ def _convert_single_to_mp4(video_path: Path, log: LogFn) -> bool:
     log(f"Converted '{video_path}' to '{out_path}'")
     return True
 
+def _remux_to_mp4(video_path: Path, out_path: Path, log: LogFn) -> bool:
+    # Copy the video elementary stream into an MP4 container, no decoding
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", str(video_path),
+        "-map", "0:v:0", "-c", "copy", "-movflags", "+faststart",
+        str(out_path),
+    ]
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if res.returncode != 0:
+        log(f"ffmpeg: {res.stderr.strip()}")
+        return False
+    return True
+
+def _convert_single_cuda(video_path: Path, out_path: Path, fps: float, size: tuple[int, int]) -> int | None:
+    # NVDEC -> NVENC, frames never leave the GPU.
+    # Returns None if the pipeline can't be set up so the caller falls back to CPU.
+    try:
+        params = cv2.cudacodec.VideoReaderInitParams()
+        params.targetSz = size
+        reader = cv2.cudacodec.createVideoReader(str(video_path), params=params)
+        writer = cv2.cudacodec.createVideoWriter(str(out_path), size, cv2.cudacodec.H264, fps,
+                                                 cv2.cudacodec.ColorFormat_BGRA)
+    except cv2.error:
+        return None
+
+    # two streams in flight: frame n decodes on one while frame n-1 is
+    # synchronised and handed to NVENC
+    streams = (cv2.cuda.Stream(), cv2.cuda.Stream())
+    pending = None
+    frames = 0
+    i = 0
+    while True:
+        # keyword: the first positional parameter of nextFrame is the output frame
+        ok, d_frame = reader.nextFrame(stream=streams[i])
+        if pending is not None:
+            pending[0].waitForCompletion()
+            writer.write(pending[1])
+            frames += 1
+        if not ok:
+            break
+        pending = (streams[i], d_frame)
+        i ^= 1
+    writer.release()
+    return frames
+
 # ------------------------
 # mergevideo implementation
 # ------------------------
-def merge_videos_recursively(input_dir: str | os.PathLike, log: LogFn = print) -> bool:
+def merge_videos_recursively(input_dir: str | os.PathLike, log: LogFn = print, jobs: int | None = None) -> bool:
     p = Path(input_dir)
     if not p.is_dir():
         log("Error: 'mergevideo' command requires a directory as input.")
@@ -178,23 +551,32 @@ def merge_videos_recursively(input_dir: str | os.PathLike, log: LogFn = print) -
     log(f"Detected directory: {p}")
     log("Starting to recursively merge video files in directory...")
     ok_all = True
-    # Process the root dir and each subdir independently
-    for current, dirs, files in os.walk(p):
-        dir_path = Path(current)
-        log(f"Processing directory: {dir_path}")
-        if not _merge_dir(dir_path, log):
+    # Process the root dir and each subdir independently; the tree is
+    # scanned once here and each job gets its directory's file list
+    dirs = list(_scan_video_tree(p).items())
+    for (dir_path, _), ok in _map_jobs(_merge_dir_job, dirs, log, jobs,
+                                       lambda d: f"Processing directory: {d[0]}"):
+        if not ok:
             log(f"Merge failed: {dir_path}")
             ok_all = False
     log("All video files in all directories merged.")
     return ok_all
 
-def _merge_dir(directory: Path, log: LogFn) -> bool:
-    vids = sorted([directory / f for f in os.listdir(directory)
-                   if is_video_file(directory / f)])
+def _merge_dir_job(job: tuple[Path, list[Path]], log: LogFn) -> bool:
+    return _merge_dir(*job, log)
+
+def _merge_dir(directory: Path, vids: list[Path], log: LogFn) -> bool:
+    out_path = directory / "merged_output.mp4"
+    # never feed a previous merge result back in; ffmpeg would read the file it is overwriting
+    vids = sorted(v for v in vids if v.name != out_path.name)
     if len(vids) < 2:
         log(f"Less than 2 video files in directory '{directory}', skipping merge.")
         return True
 
+    if shutil.which("ffmpeg") and _concat_copy(vids, out_path, log):
+        log(f"Merged {len(vids)} videos in directory '{directory}' into '{out_path}' (stream copy, audio dropped)")
+        return True
+
     # Use first video as reference for size & fps
     cap0 = cv2.VideoCapture(str(vids[0]))
     if not cap0.isOpened():
@@ -203,40 +585,201 @@ def _merge_dir(directory: Path, log: LogFn) -> bool:
     fps0 = _safe_fps(cap0, 25.0)
     w0 = int(cap0.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
     h0 = int(cap0.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
-    cap0.release()
     if w0 == 0 or h0 == 0:
+        cap0.release()
         log(f"Error: Cannot determine resolution from '{vids[0]}'.")
         return False
 
-    out_path = directory / "merged_output.mp4"
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    writer = cv2.VideoWriter(str(out_path), fourcc, fps0, (w0, h0))
-    if not writer.isOpened():
-        log(f"Error: Cannot create '{out_path}'.")
+    total_frames = None
+    if _cuda_available():
+        cap0.release()
+        total_frames = _merge_cuda(vids, out_path, fps0, (w0, h0), log)
+        if total_frames is None:
+            cap0 = cv2.VideoCapture(str(vids[0]))
+    if total_frames is None:
+        writer = _open_mp4_writer(out_path, fps0, (w0, h0))
+        if not writer.isOpened():
+            cap0.release()
+            log(f"Error: Cannot create '{out_path}'.")
+            return False
+
+        # resize target reused for every frame of every mismatched video
+        resized = np.empty((h0, w0, 3), dtype=np.uint8)
+        total_frames = 0
+        # Open (probe + decoder setup) the next input on a helper thread while
+        # the current one streams into the writer; with many short clips the
+        # open latency is otherwise paid serially for every file. The first
+        # input is already open from reading the reference size/fps.
+        with ThreadPoolExecutor(max_workers=1) as opener:
+            cap = cap0
+            next_cap = opener.submit(cv2.VideoCapture, str(vids[1]))
+            try:
+                for n, v in enumerate(vids):
+                    if n:
+                        cap, next_cap = next_cap.result(), None
+                        if n + 1 < len(vids):
+                            next_cap = opener.submit(cv2.VideoCapture, str(vids[n + 1]))
+                    if not cap.isOpened():
+                        log(f"Error: Cannot open '{v}', skipping.")
+                        continue
+                    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+                    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+                    # decide once per video instead of checking every frame
+                    transform = None
+                    if w != w0 or h != h0:
+                        log(f"Warning: Resizing '{v.name}' from {w}x{h} to {w0}x{h0} to match first video.")
+                        transform = _area_resizer((w0, h0), resized)
+                    total_frames += _pipe_cap_to_writer(cap, writer, (h, w), transform)
+                    cap.release()
+            finally:
+                # release() is idempotent; this covers an exception mid-stream
+                cap.release()
+                if next_cap is not None:
+                    next_cap.result().release()
+                writer.release()
+    log("Note: Audio is not preserved when merging without ffmpeg.")
+    log(f"Merged {len(vids)} videos in directory '{directory}' into '{out_path}' (frames written: {total_frames})")
+    return True
+
+def _pipe_cap_to_writer(cap, writer, shape: tuple[int, int],
+                        transform: Callable[[np.ndarray], np.ndarray] | None = None) -> int:
+    # Two-stage pipeline: a helper thread decodes while this thread
+    # transforms/encodes (both release the GIL inside OpenCV). Decoded
+    # frames land in a fixed pool of buffers that cycles between free_q
+    # and frames_q, so nothing is allocated per frame and at most
+    # len(pool) frames are in flight.
+    h, w = shape
+    free_q: queue.Queue = queue.Queue()
+    for _ in range(4):
+        free_q.put(np.empty((h, w, 3), dtype=np.uint8))
+    frames_q: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    # an exception in the decoder must not look like a normal end of stream
+    error: list[BaseException] = []
+
+    def decode():
+        try:
+            while not stop.is_set():
+                ok, frame = cap.read(free_q.get())
+                if not ok:
+                    break
+                frames_q.put(frame)
+        except BaseException as e:
+            error.append(e)
+        finally:
+            frames_q.put(None)
+
+    reader = threading.Thread(target=decode, daemon=True)
+    reader.start()
+    write = writer.write
+    frames = 0
+    try:
+        while True:
+            frame = frames_q.get()
+            if frame is None:
+                break
+            write(frame if transform is None else transform(frame))
+            free_q.put(frame)
+            frames += 1
+    finally:
+        # unblock the decoder if we bailed out early
+        stop.set()
+        free_q.put(None)
+        reader.join()
+    if error:
+        raise error[0]
+    return frames
+
+# Per-video frame transform. Size and buffer are bound once as closure
+# locals; reading dst.shape per frame would build a new tuple each time.
+# A single INTER_AREA pass already takes OpenCV's integer-scale fast path.
+def _area_resizer(size: tuple[int, int], dst: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+    resize, area = cv2.resize, cv2.INTER_AREA
+
+    def transform(frame: np.ndarray) -> np.ndarray:
+        return resize(frame, size, dst=dst, interpolation=area)
+    return transform
+
+def _concat_copy(vids: list[Path], out_path: Path, log: LogFn) -> bool:
+    # Join with ffmpeg's concat demuxer without re-encoding. Only possible when
+    # every input carries the same MP4-compatible stream layout; a mismatch
+    # in profile/level or bitstream packaging (AVI stores H.264 as Annex-B,
+    # MP4/MKV as avcC) still exits 0 but writes a corrupt file, so inputs
+    # must also share a container.
+    suffix = vids[0].suffix.lower()
+    if any(v.suffix.lower() != suffix for v in vids[1:]):
+        return False
+    entries = "codec_name,codec_tag_string,profile,level,width,height,pix_fmt,r_frame_rate"
+    ref = _probe_video_stream(vids[0], entries)
+    if ref is None or ref.get("codec_name") not in _REMUX_CODECS:
         return False
+    for v in vids[1:]:
+        if _probe_video_stream(v, entries) != ref:
+            log(f"Note: '{v.name}' differs in codec/profile/size/fps from '{vids[0].name}', re-encoding merge.")
+            return False
+
+    fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="concat_")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for v in vids:
+                quoted = str(v.resolve()).replace("'", "'\\''")
+                f.write(f"file '{quoted}'\n")
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-map", "0:v:0", "-c", "copy", "-movflags", "+faststart",
+            str(out_path),
+        ]
+        res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    finally:
+        os.unlink(list_path)
+    if res.returncode != 0:
+        log(f"Warning: Stream-copy merge failed in '{out_path.parent}', re-encoding instead: {res.stderr.strip()}")
+        return False
+    return True
+
+def _merge_cuda(vids: list[Path], out_path: Path, fps: float, size: tuple[int, int], log: LogFn) -> int | None:
+    # GPU counterpart of the merge loop in _merge_dir.
+    # Returns None if the NVENC writer can't be created so the caller falls back to CPU.
+    try:
+        writer = cv2.cudacodec.createVideoWriter(str(out_path), size, cv2.cudacodec.H264, fps,
+                                                 cv2.cudacodec.ColorFormat_BGRA)
+    except cv2.error:
+        return None
 
+    w0, h0 = size
+    # double-buffered like _convert_single_cuda: decode+resize of frame n
+    # on one stream overlaps the NVENC hand-off of frame n-1
+    streams = (cv2.cuda.Stream(), cv2.cuda.Stream())
+    d_resized = (cv2.cuda_GpuMat(), cv2.cuda_GpuMat())
     total_frames = 0
     for v in vids:
-        cap = cv2.VideoCapture(str(v))
-        if not cap.isOpened():
+        try:
+            reader = cv2.cudacodec.createVideoReader(str(v))
+        except cv2.error:
             log(f"Error: Cannot open '{v}', skipping.")
             continue
-        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
-        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
-        if w != w0 or h != h0:
+        # decide once per video from the stream format instead of d_frame.size() per frame
+        fmt = reader.format()
+        w, h = fmt.width, fmt.height
+        needs_resize = w != w0 or h != h0
+        if needs_resize:
             log(f"Warning: Resizing '{v.name}' from {w}x{h} to {w0}x{h0} to match first video.")
+        pending = None
+        i = 0
         while True:
-            ok, frame = cap.read()
+            # keyword: the first positional parameter of nextFrame is the output frame
+            ok, d_frame = reader.nextFrame(stream=streams[i])
+            if ok and needs_resize:
+                d_frame = cv2.cuda.resize(d_frame, size, d_resized[i],
+                                          interpolation=cv2.INTER_AREA, stream=streams[i])
+            if pending is not None:
+                pending[0].waitForCompletion()
+                writer.write(pending[1])
+                total_frames += 1
             if not ok:
                 break
-            if frame.shape[1] != w0 or frame.shape[0] != h0:
-                frame = cv2.resize(frame, (w0, h0), interpolation=cv2.INTER_AREA)
-            writer.write(frame)
-            total_frames += 1
-        cap.release()
-
+            pending = (streams[i], d_frame)
+            i ^= 1
     writer.release()
-    log("Note: Audio is not preserved when merging without ffmpeg.")
-    log(f"Merged {len(vids)} videos in directory '{directory}' into '{out_path}' (frames written: {total_frames})")
-    return True
-
+    return total_frames
@@ -1,24 +1,43 @@
 # video_tool_gui.py
 from __future__ import annotations
 import sys
+from collections import deque
 from pathlib import Path
-from PyQt6 import QtWidgets, QtCore
+from PyQt6 import QtWidgets, QtCore, QtGui
 from video_tool_core import extract_frames, convert_to_mp4, merge_videos_recursively
 
 class Worker(QtCore.QThread):
-    line = QtCore.pyqtSignal(str)
     done = QtCore.pyqtSignal(bool)
 
+    # how often ToolTab drains the buffered log lines
+    FLUSH_MS = 50
+
     def __init__(self, fn, arg):
         super().__init__()
         self.fn = fn
         self.arg = arg
+        # deque.append/popleft are thread-safe, so no lock is needed
+        self._buf: deque[str] = deque()
+
+    def _log(self, msg: str):
+        self._buf.append(msg)
+
+    def take_log(self) -> str:
+        # newline-terminated batch of everything logged so far
+        lines = []
+        try:
+            while True:
+                lines.append(self._buf.popleft())
+        except IndexError:
+            pass
+        return "\n".join(lines) + "\n" if lines else ""
 
     def run(self):
-        def logger(msg: str):
-            self.line.emit(msg)
-        ok = self.fn(self.arg, log=logger)
-        self.done.emit(ok)
+        ok = False
+        try:
+            ok = self.fn(self.arg, log=self._log)
+        finally:
+            self.done.emit(ok)
 
 class ToolTab(QtWidgets.QWidget):
     def __init__(self, label: str, picker_kind: str, action_label: str, action_fn):
@@ -39,6 +58,7 @@ class ToolTab(QtWidgets.QWidget):
         self.run_btn.clicked.connect(self.start)
         self.log = QtWidgets.QTextEdit()
         self.log.setReadOnly(True)
+        self.log.document().setMaximumBlockCount(10000)
 
         v = QtWidgets.QVBoxLayout(self)
         v.addLayout(top)
@@ -46,6 +66,11 @@ class ToolTab(QtWidgets.QWidget):
         v.addWidget(self.log)
 
         self.worker: Worker | None = None
+        # one insert per FLUSH_MS instead of one per line keeps the GUI
+        # thread from relayouting the log for every message
+        self.log_timer = QtCore.QTimer(self)
+        self.log_timer.setInterval(Worker.FLUSH_MS)
+        self.log_timer.timeout.connect(self.drain_log)
 
     def browse(self):
         if self.picker_kind == "file":
@@ -68,12 +93,26 @@ class ToolTab(QtWidgets.QWidget):
         self.run_btn.setEnabled(False)
         self.log.clear()
         self.worker = Worker(self.action_fn, path)
-        self.worker.line.connect(lambda s: self.log.append(s))
-        self.worker.done.connect(self.finish)
+        self.worker.done.connect(self.finish, QtCore.Qt.ConnectionType.QueuedConnection)
+        self.log_timer.start()
         self.worker.start()
 
+    def drain_log(self):
+        if self.worker is not None:
+            batch = self.worker.take_log()
+            if batch:
+                self.append_log(batch)
+
+    def append_log(self, batch: str):
+        # plain-text insert at the end skips append()'s rich-text parsing
+        self.log.moveCursor(QtGui.QTextCursor.MoveOperation.End)
+        self.log.insertPlainText(batch)
+
     def finish(self, ok: bool):
-        self.log.append("\n✅ Done." if ok else "\n❌ Finished with errors.")
+        # done is emitted after the last log call, so this drains everything
+        self.log_timer.stop()
+        self.drain_log()
+        self.append_log("\n✅ Done.\n" if ok else "\n❌ Finished with errors.\n")
         self.run_btn.setEnabled(True)
         self.worker = None
 